@@ -2,10 +2,14 @@
 Example usage of the Road Segmentation Tool
 """
 
-from src.road_splitter import split_roads_simple, RoadSegmenter
+import logging
+
+# road_splitter is imported inside each example: spawned pool workers
+# re-run this file, and a top-level import would load arcpy in every one
 
 def example_1_simple():
     """Simplest usage example"""
+    from src.road_splitter import split_roads_simple
     print("Example 1: Simple interface")
     
     result = split_roads_simple(
@@ -18,6 +22,7 @@ def example_1_simple():
 
 def example_2_advanced():
     """Advanced usage with more control"""
+    from src.road_splitter import RoadSegmenter
     print("Example 2: Advanced interface")
     
     # Initialize with custom workspace
@@ -41,6 +46,7 @@ def example_2_advanced():
 
 def example_3_multiple_lengths():
     """Example with different segment lengths"""
+    from src.road_splitter import RoadSegmenter
     print("Example 3: Multiple segment lengths")
     
     segmenter = RoadSegmenter()
@@ -59,6 +65,8 @@ def example_3_multiple_lengths():
             print(f"  {length}km: {result['segments']} segments")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
     print("Road Segmentation Tool - Examples")
     print("=" * 50)
     
@@ -5,39 +5,120 @@ Description: Convert WGS84 roads to UTM and split into equal segments
 """
 
 import arcpy
+import numpy as np
 import os
+import shutil
+import sys
+import tempfile
 import time
 import logging
-from typing import Optional, Dict
+import multiprocessing
+import multiprocessing.spawn
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, repeat
+from math import ceil
+from typing import Optional, Callable, Dict, Iterable, List, Tuple
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    from pyogrio.raw import write as ogr_write
+except ImportError:
+    ogr_write = None
+
+try:
+    from .split_kernels import oid_batches, segment_label, split_one
+except ImportError:
+    # Run as a script from src/
+    from split_kernels import oid_batches, segment_label, split_one
+
+# Setup logging (handlers are configured by the application)
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+def _gdb_join(ws: str, name: str) -> str:
+    """Join a feature class name onto a workspace, using backslash for .gdb"""
+    return f"{ws}\\{name}" if ws.lower().endswith(".gdb") else os.path.join(ws, name)
+
+# First release of each product whose tools accept Arrow tables as input
+_ARROW_MIN_VERSION = {"ArcGISPro": (3, 3), "Server": (11, 3)}
+
+def _arrow_supported() -> bool:
+    """True when tools accept Arrow tables and shapely 2 is present"""
+    if pa is None or not hasattr(shapely, "to_wkb"):
+        return False
+    
+    info = arcpy.GetInstallInfo()
+    min_version = _ARROW_MIN_VERSION.get(info.get("ProductName"))
+    if min_version is None:
+        return False
+    
+    version = tuple(int(v) for v in info.get("Version", "0.0").split(".")[:2])
+    return version >= min_version
+
+def _gpkg_supported() -> bool:
+    """True when pyogrio and shapely 2 are present for the GeoPackage writer"""
+    return ogr_write is not None and hasattr(shapely, "to_wkb")
+
+def _rows_to_wkb(shapes: Iterable) -> List[bytes]:
+    """
+    WKB for each output shape. Raw coordinate lists are encoded in one
+    vectorized shapely call; arcpy geometries use their own WKB.
+    """
+    shapes = list(shapes)
+    coord_rows = [shape for shape in shapes if isinstance(shape, list)]
+    wkb = iter(())
+    if coord_rows:
+        coords = np.array(list(chain.from_iterable(coord_rows)), dtype=np.float64)
+        indices = np.repeat(np.arange(len(coord_rows)), [len(c) for c in coord_rows])
+        wkb = iter(shapely.to_wkb(shapely.linestrings(coords, indices=indices)).tolist())
+    
+    return [next(wkb) if isinstance(shape, list) else bytes(shape.WKB)
+            for shape in shapes]
 
 class RoadSegmenter:
     """Main class for road segmentation"""
     
-    UTM_ZONE_39N = """PROJCS["WGS_1984_UTM_Zone_39N",
-        GEOGCS["GCS_WGS_1984",
-            DATUM["D_WGS_1984",
-                SPHEROID["WGS_1984",6378137.0,298.257223563]],
-            PRIMEM["Greenwich",0.0],
-            UNIT["Degree",0.0174532925199433]],
-        PROJECTION["Transverse_Mercator"],
-        PARAMETER["False_Easting",500000.0],
-        PARAMETER["False_Northing",0.0],
-        PARAMETER["Central_Meridian",51.0],
-        PARAMETER["Scale_Factor",0.9996],
-        PARAMETER["Latitude_Of_Origin",0.0],
-        UNIT["Meter",1.0]]"""
-    
-    def __init__(self, workspace: Optional[str] = None):
+    OUTPUT_FIELDS = ["SHAPE@", "SEGMENT_ID", "ROAD_ID", "LENGTH_KM", "LABEL"]
+    
+    # Scratch workspace for building output before it is copied to disk
+    MEMORY_WS = "memory"
+    
+    # Features read, split and written per ObjectID range
+    READ_BATCH = 10000
+    
+    # Fewer input features than this are split without a process pool.
+    # Spawning workers costs about half a second, and shipping a typical
+    # road to a worker costs about as much as splitting it in place
+    PARALLEL_MIN_ROADS = 20000
+    
+    # Fewer input features than this skip the GeoPackage writer, whose temp
+    # file and Append per batch only pay off on large outputs
+    GPKG_MIN_FEATURES = 50000
+    
+    @classmethod
+    def _utm_sr(cls) -> arcpy.SpatialReference:
+        """WGS 1984 UTM Zone 39N, from its factory code"""
+        return arcpy.SpatialReference(32639)
+    
+    def __init__(self, workspace: Optional[str] = None,
+                 max_workers: Optional[int] = None):
+        self.max_workers = max_workers
         if workspace:
             arcpy.env.workspace = workspace
         arcpy.env.overwriteOutput = True
+        
+        self._use_arrow = _arrow_supported()
+        self._use_gpkg = _gpkg_supported()
         logger.info("RoadSegmenter initialized")
     
     def split_roads(self, input_fc: str, output_name: str, 
@@ -47,61 +128,88 @@ class RoadSegmenter:
         logger.info(f"Starting: {input_fc} → {segment_length_km}km segments")
         
         try:
-            # 1. Validate
-            if not arcpy.Exists(input_fc):
-                return {"success": False, "error": "Input not found"}
-            
-            # 2. Project to UTM
-            projected = self._project_to_utm(input_fc)
-            
-            # 3. Create output
-            output_fc = os.path.join(arcpy.env.workspace, output_name)
-            self._create_output(projected, output_fc)
-            
-            # 4. Split
-            results = self._perform_split(projected, output_fc, segment_length_km)
-            
-            # 5. Cleanup
-            if arcpy.Exists(projected):
-                arcpy.Delete_management(projected)
-            
-            return {
-                "success": True,
-                "output": output_fc,
-                "segments": results["segments"],
-                "time": results["time"]
-            }
+            # SR and overwrite are resolved once for every tool call below
+            with arcpy.EnvManager(outputCoordinateSystem=self._utm_sr(),
+                                  overwriteOutput=True,
+                                  workspace=arcpy.env.workspace):
+                # 1. Validate
+                if not arcpy.Exists(input_fc):
+                    return {"success": False, "error": "Input not found"}
+                
+                # 2. Project to UTM on the fly while reading
+                read_sr = self._read_sr(input_fc)
+                
+                bulk_write = self._bulk_writer(input_fc)
+                if bulk_write:
+                    # 3. Create output on disk; batches are appended into it
+                    output_fc = self._create_output(arcpy.env.workspace, output_name)
+                    
+                    # 4. Split
+                    results = self._perform_split(input_fc, output_fc, segment_length_km,
+                                                  read_sr, bulk_write)
+                else:
+                    # 3. Create output (built in memory, copied to disk when done)
+                    output_fc = _gdb_join(arcpy.env.workspace, output_name)
+                    scratch_fc = self._create_output(self.MEMORY_WS, output_name)
+                    
+                    try:
+                        # 4. Split
+                        results = self._perform_split(input_fc, scratch_fc,
+                                                      segment_length_km, read_sr)
+                        arcpy.CopyFeatures_management(scratch_fc, output_fc)
+                    finally:
+                        # 5. Cleanup, also on failure so no memory class lingers
+                        arcpy.Delete_management(scratch_fc)
+                
+                return {
+                    "success": True,
+                    "output": output_fc,
+                    "segments": results["segments"],
+                    "time": results["time"]
+                }
             
         except Exception as e:
             logger.error(f"Error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def _project_to_utm(self, input_fc: str) -> str:
-        """Project to UTM Zone 39N"""
-        projected = f"{input_fc}_UTM"
+    def _read_sr(self, input_fc: str) -> Optional[arcpy.SpatialReference]:
+        """Spatial reference to read the input in, None to read it as stored"""
+        sr = arcpy.Describe(input_fc).spatialReference
+        if sr.name in ("Unknown", ""):
+            # Nothing to project from; treat coordinates as UTM 39N already
+            logger.warning(f"{input_fc} has no spatial reference, assuming UTM Zone 39N")
+            return None
         
-        if arcpy.Exists(projected):
-            arcpy.Delete_management(projected)
+        if sr.factoryCode == 32639 or sr.name == "WGS_1984_UTM_Zone_39N":
+            # Already projected, read the input as-is
+            return None
         
-        try:
-            arcpy.Project_management(input_fc, projected, self.UTM_ZONE_39N)
-        except:
-            # Fallback
-            arcpy.CopyFeatures_management(input_fc, projected)
-            arcpy.DefineProjection_management(projected, self.UTM_ZONE_39N)
+        return self._utm_sr()
+    
+    def _bulk_writer(self, input_fc: str) -> Optional[Callable]:
+        """Bulk writer for this input, None for the memory + InsertCursor path"""
+        if self._use_arrow:
+            return self._write_arrow
         
-        return projected
+        if self._use_gpkg and \
+           int(arcpy.GetCount_management(input_fc)[0]) >= self.GPKG_MIN_FEATURES:
+            return self._write_gpkg
+        
+        return None
     
-    def _create_output(self, template_fc: str, output_fc: str):
-        """Create output feature class"""
+    def _create_output(self, workspace: str, output_name: str) -> str:
+        """Create the output feature class in workspace (SR from env)"""
+        if workspace == self.MEMORY_WS:
+            output_fc = f"{workspace}\\{output_name}"
+        else:
+            output_fc = _gdb_join(workspace, output_name)
         if arcpy.Exists(output_fc):
             arcpy.Delete_management(output_fc)
         
         arcpy.CreateFeatureclass_management(
-            os.path.dirname(output_fc),
-            os.path.basename(output_fc),
-            "POLYLINE",
-            template=template_fc
+            workspace,
+            output_name,
+            "POLYLINE"
         )
         
         # Add fields
@@ -118,54 +226,229 @@ class RoadSegmenter:
             else:
                 arcpy.AddField_management(output_fc, field[0], field[1], 
                                          field_length=field[3], field_alias=field[2])
+        
+        return output_fc
     
     def _perform_split(self, input_fc: str, output_fc: str, 
-                      segment_length_km: float) -> Dict:
-        """Perform the actual splitting"""
+                      segment_length_km: float,
+                      read_sr: Optional[arcpy.SpatialReference] = None,
+                      bulk_write: Optional[Callable] = None) -> Dict:
+        """Perform the actual splitting, one ObjectID batch at a time"""
         segment_m = segment_length_km * 1000
         start = time.time()
-        total_segments = 0
         road_id = 1
+        total_segments = 0
+        
+        # ObjectIDs, read without geometry. Batch bounds follow the IDs that
+        # exist, so sparse IDs never produce empty batches
+        oid_field = arcpy.AddFieldDelimiters(input_fc, arcpy.Describe(input_fc).OIDFieldName)
+        with arcpy.da.SearchCursor(input_fc, ["OID@"]) as cursor:
+            oids = np.sort(np.fromiter((row[0] for row in cursor), dtype=np.int64))
+        bounds = oid_batches(oids, self.READ_BATCH)
+        
+        # Each batch is read, split and written before the next is opened,
+        # so read locks are short and the row buffer stays bounded
+        with self._open_pool(len(oids)) as executor:
+            for lo, hi in bounds:
+                where = f"{oid_field} BETWEEN {lo} AND {hi}"
+                rows, road_id = self._split_batch(
+                    input_fc, where, read_sr, segment_m, road_id, executor
+                )
+                if not rows:
+                    continue
+                
+                if bulk_write:
+                    bulk_write(output_fc, rows)
+                else:
+                    self._flush_rows(output_fc, rows)
+                total_segments += len(rows)
         
-        with arcpy.da.SearchCursor(input_fc, ["OID@", "SHAPE@"]) as s_cursor, \
-             arcpy.da.InsertCursor(output_fc, ["SHAPE@", "SEGMENT_ID", "ROAD_ID", 
-                                             "LENGTH_KM", "LABEL"]) as i_cursor:
+        return {
+            "segments": total_segments,
+            "time": time.time() - start
+        }
+    
+    def _split_batch(self, input_fc: str, where_clause: str,
+                     read_sr: Optional[arcpy.SpatialReference], segment_m: float,
+                     road_id: int, executor: Optional[ProcessPoolExecutor]) -> Tuple[List[Tuple], int]:
+        """Split the roads matching where_clause, returning rows and the next road ID"""
+        rows_buffer = []
+        append = rows_buffer.append
+        jobs_pts, jobs_ids, jobs_slots = [], [], []
+        
+        # Read the batch, splitting short and multipart roads in place and
+        # queueing single-part vertex arrays for the worker pool
+        with arcpy.da.SearchCursor(input_fc, ["OID@", "SHAPE@"],
+                                   where_clause=where_clause,
+                                   spatial_reference=read_sr) as s_cursor:
             
             for oid, geom in s_cursor:
                 if not geom:
                     continue
                 
-                if geom.length <= segment_m:
+                L = geom.length
+                if L <= segment_m:
                     # Single segment
-                    i_cursor.insertRow([
-                        geom, 1, road_id, geom.length/1000, f"R{road_id}_S01"
-                    ])
-                    total_segments += 1
+                    append((
+                        geom, 1, road_id, L/1000, f"R{road_id}_S01"
+                    ))
+                elif geom.partCount == 1 and not geom.hasCurves:
+                    # Multiple segments on a straight-edged single-part road,
+                    # cut on the extracted vertex array (getPart would turn
+                    # arcs into chords, so true curves go to segmentAlongLine);
+                    # reserve this road's rows so results land in road order
+                    n = ceil(L / segment_m)
+                    jobs_pts.append(np.fromiter(
+                        (c for p in geom.getPart(0) for c in (p.X, p.Y)),
+                        dtype=np.float64
+                    ).reshape(-1, 2))
+                    jobs_ids.append(road_id)
+                    jobs_slots.append((len(rows_buffer), n))
+                    rows_buffer.extend(repeat(None, n))
                 else:
-                    # Multiple segments
-                    cumulative = 0
-                    seg_num = 1
+                    # Multipart or true-curve roads: let ArcPy walk the
+                    # parts and arcs
+                    seg_along = geom.segmentAlongLine
+                    n = ceil(L / segment_m)
+                    prefix = f"R{road_id}_S"
                     
-                    while cumulative < geom.length:
-                        start_ratio = cumulative / geom.length
-                        end_ratio = min((cumulative + segment_m) / geom.length, 1.0)
-                        
-                        segment = geom.segmentAlongLine(start_ratio, end_ratio, False)
-                        i_cursor.insertRow([
-                            segment, seg_num, road_id, 
-                            segment.length/1000, f"R{road_id}_S{seg_num:02d}"
-                        ])
+                    for seg_num in range(1, n + 1):
+                        cumulative = (seg_num - 1) * segment_m
+                        start_ratio = cumulative / L
+                        end_ratio = min((cumulative + segment_m) / L, 1.0)
+                        this_len = min(segment_m, L - cumulative)
                         
-                        cumulative += segment.length
-                        seg_num += 1
-                        total_segments += 1
+                        segment = seg_along(start_ratio, end_ratio, False)
+                        append((
+                            segment, seg_num, road_id, this_len/1000,
+                            segment_label(prefix, seg_num)
+                        ))
                 
                 road_id += 1
         
-        return {
-            "segments": total_segments,
-            "time": time.time() - start
-        }
+        # Split queued roads into their reserved slots; their rows carry raw
+        # coordinates, which the writers turn into geometry
+        if jobs_ids:
+            results = self._map_split(jobs_pts, jobs_ids, segment_m, executor)
+            
+            # Filled back to front: if the vertex length rounds to a different
+            # piece count than geom.length, only already-filled rows shift
+            for (pos, n), road_rows in zip(reversed(jobs_slots), reversed(results)):
+                rows_buffer[pos:pos + n] = road_rows
+        
+        return rows_buffer, road_id
+    
+    @contextmanager
+    def _open_pool(self, n_features: int):
+        """Process pool shared by all batches, or None when not worthwhile"""
+        if self.max_workers == 1 or n_features < self.PARALLEL_MIN_ROADS:
+            yield None
+            return
+        
+        # Workers unpickle split_one from split_kernels, but spawn also
+        # re-runs the launching script: run as `python road_splitter.py`,
+        # every worker still imports arcpy (see examples/ for a lazy import)
+        
+        # Inside ArcGIS Pro sys.executable is the application, not Python.
+        # The spawn interpreter is process-global, so it is only swapped
+        # while the pool is open and restored afterwards
+        previous = multiprocessing.spawn.get_executable()
+        swap = os.name == "nt" and not sys.executable.lower().endswith("python.exe")
+        if swap:
+            multiprocessing.set_executable(os.path.join(sys.exec_prefix, "python.exe"))
+        
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                yield executor
+        finally:
+            if swap:
+                multiprocessing.set_executable(previous)
+    
+    def _map_split(self, jobs_pts: List[np.ndarray], jobs_ids: List[int],
+                   segment_m: float,
+                   executor: Optional[ProcessPoolExecutor]) -> List[List[Tuple]]:
+        """Run split_one over queued roads, in the process pool when worthwhile"""
+        if executor is None or len(jobs_ids) < self.PARALLEL_MIN_ROADS:
+            return list(map(split_one, jobs_pts, jobs_ids, repeat(segment_m)))
+        
+        return list(executor.map(split_one, jobs_pts, jobs_ids,
+                                 repeat(segment_m), chunksize=64))
+    
+    def _flush_rows(self, output_fc: str, rows: List[Tuple]):
+        """Insert buffered rows into the memory scratch feature class"""
+        # No edit session or locks needed in the memory workspace
+        with arcpy.da.InsertCursor(output_fc, self.OUTPUT_FIELDS) as i_cursor:
+            insert = i_cursor.insertRow
+            for row in self._as_polylines(rows):
+                insert(row)
+    
+    def _as_polylines(self, rows: Iterable[Tuple]) -> Iterable[Tuple]:
+        """Yield rows with raw coordinate lists rebuilt as Polylines"""
+        sr = self._utm_sr()
+        
+        # One Array and Point reused for every row; add() and Polyline copy them
+        scratch = arcpy.Array()
+        point = arcpy.Point()
+        for row in rows:
+            shape = row[0]
+            if isinstance(shape, list):
+                scratch.removeAll()
+                for x, y in shape:
+                    point.X, point.Y = x, y
+                    scratch.add(point)
+                row = (arcpy.Polyline(scratch, sr),) + row[1:]
+            yield row
+    
+    def _write_arrow(self, output_fc: str, rows: List[Tuple]):
+        """Append rows to output_fc as one Arrow table with WKB geometry"""
+        shapes, seg_ids, road_ids, lengths, labels = zip(*rows)
+        
+        schema = pa.schema([
+            pa.field("SHAPE", pa.binary(), metadata={
+                "esri.encoding": "WKB",
+                "esri.sr_wkt": self._utm_sr().exportToString()
+            }),
+            pa.field("SEGMENT_ID", pa.int32()),
+            pa.field("ROAD_ID", pa.int32()),
+            pa.field("LENGTH_KM", pa.float64()),
+            pa.field("LABEL", pa.string())
+        ])
+        table = pa.Table.from_pydict({
+            "SHAPE": _rows_to_wkb(shapes),
+            "SEGMENT_ID": list(seg_ids),
+            "ROAD_ID": list(road_ids),
+            "LENGTH_KM": list(lengths),
+            "LABEL": list(labels)
+        }, schema=schema)
+        
+        arcpy.Append_management(table, output_fc, "NO_TEST")
+    
+    def _write_gpkg(self, output_fc: str, rows: List[Tuple]):
+        """Write rows to a temporary GeoPackage through GDAL, then append it"""
+        shapes, seg_ids, road_ids, lengths, labels = zip(*rows)
+        layer = os.path.basename(output_fc.replace("\\", "/"))
+        tmp_dir = tempfile.mkdtemp()
+        gpkg = os.path.join(tmp_dir, "segments.gpkg")
+        
+        try:
+            ogr_write(
+                gpkg,
+                np.array(_rows_to_wkb(shapes), dtype=object),
+                [np.array(seg_ids, dtype=np.int32),
+                 np.array(road_ids, dtype=np.int32),
+                 np.array(lengths, dtype=np.float64),
+                 np.array(labels, dtype=object)],
+                self.OUTPUT_FIELDS[1:],
+                layer=layer,
+                driver="GPKG",
+                geometry_type="MultiLineString",
+                promote_to_multi=True,
+                crs="EPSG:32639"
+            )
+            arcpy.Append_management(os.path.join(gpkg, f"main.{layer}"), output_fc, "NO_TEST")
+        finally:
+            arcpy.ClearWorkspaceCache_management(gpkg)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
 
 # Simple interface
 def split_roads_simple(input_fc: str, output_name: str, 
@@ -187,6 +470,11 @@ def split_roads_simple(input_fc: str, output_name: str,
         return None
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    
     # Example usage
     output = split_roads_simple(
         input_fc="roadlinkdin",
@@ -0,0 +1,129 @@
+"""
+Road Segmentation Tool - splitting kernels
+Description: Pure NumPy/Numba geometry math for cutting vertex arrays into
+equal-length pieces. Kept free of arcpy so pool workers import it cheaply.
+"""
+
+import numpy as np
+from typing import List, Tuple
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Pre-formatted segment numbers for labels; most roads have far fewer pieces
+SUFFIXES = [f"{i:02d}" for i in range(256)]
+
+def segment_label(prefix: str, seg_num: int) -> str:
+    """Label for segment seg_num of a road, e.g. R12_S03"""
+    return prefix + (SUFFIXES[seg_num] if seg_num < len(SUFFIXES) else f"{seg_num:02d}")
+
+def oid_batches(oids: np.ndarray, batch: int) -> List[Tuple[int, int]]:
+    """
+    Inclusive (lo, hi) ObjectID bounds covering sorted oids in runs of batch
+    
+    Bounds come from the IDs themselves, so gaps in the ObjectID sequence
+    never produce empty batches.
+    """
+    oids = np.asarray(oids, dtype=np.int64)
+    los = oids[::batch]
+    his = oids[np.minimum(np.arange(len(los)) * batch + batch - 1, len(oids) - 1)]
+    return list(zip(los.tolist(), his.tolist()))
+
+def split_vertices(pts: np.ndarray, segment_m: float) -> Tuple[np.ndarray, ...]:
+    """
+    Split a vertex array into pieces of segment_m along its length
+    
+    Returns (starts, ends, split_xs, split_ys, lengths). Piece k runs from
+    split point k through pts[starts[k]:ends[k]] to split point k + 1; a
+    split point that lands exactly on a vertex is not repeated.
+    """
+    seg_vec = np.diff(pts, axis=0)
+    seg_len = np.hypot(seg_vec[:, 0], seg_vec[:, 1])
+    cum = np.concatenate(([0.0], np.cumsum(seg_len)))
+    total = cum[-1]
+    
+    # Breakpoints every segment_m, plus both ends of the line
+    bounds = np.append(np.arange(0.0, total, segment_m), total)
+    
+    # Edge containing each breakpoint and the position along it
+    edge = np.clip(np.searchsorted(cum, bounds, side="right") - 1, 0, len(seg_len) - 1)
+    edge_len = seg_len[edge]
+    t = np.divide(bounds - cum[edge], edge_len,
+                  out=np.zeros_like(bounds), where=edge_len > 0)
+    split = pts[edge] + t[:, None] * seg_vec[edge]
+    
+    # A piece ends before the start vertex of its closing edge when the
+    # split point sits exactly on that vertex
+    ends = edge[1:] + (t[1:] > 0)
+    
+    return edge[:-1] + 1, ends, split[:, 0], split[:, 1], np.diff(bounds)
+
+def split_kernel(xs: np.ndarray, ys: np.ndarray,
+                 segment_m: float) -> Tuple[np.ndarray, ...]:
+    """
+    Loop form of split_vertices over separate x/y arrays, compiled with
+    Numba when it is installed
+    """
+    n_vertices = xs.shape[0]
+    cum = np.empty(n_vertices)
+    cum[0] = 0.0
+    for i in range(1, n_vertices):
+        cum[i] = cum[i - 1] + np.hypot(xs[i] - xs[i - 1], ys[i] - ys[i - 1])
+    total = cum[n_vertices - 1]
+    
+    n = int(np.ceil(total / segment_m))
+    edges = np.empty(n + 1, dtype=np.int64)
+    ends = np.empty(n, dtype=np.int64)
+    split_xs = np.empty(n + 1)
+    split_ys = np.empty(n + 1)
+    lengths = np.empty(n)
+    
+    # Breakpoints are increasing, so the containing edge only moves forward
+    i = 0
+    for k in range(n + 1):
+        d = total if k == n else k * segment_m
+        while i < n_vertices - 2 and cum[i + 1] <= d:
+            i += 1
+        edge_len = cum[i + 1] - cum[i]
+        t = (d - cum[i]) / edge_len if edge_len > 0 else 0.0
+        split_xs[k] = xs[i] + t * (xs[i + 1] - xs[i])
+        split_ys[k] = ys[i] + t * (ys[i + 1] - ys[i])
+        edges[k] = i
+        if k > 0:
+            # Stop before vertex i when the split point sits exactly on it
+            ends[k - 1] = i + 1 if t > 0 else i
+            lengths[k - 1] = d - (k - 1) * segment_m
+    
+    return edges[:-1] + 1, ends, split_xs, split_ys, lengths
+
+if njit is not None:
+    split_kernel = njit(cache=True, fastmath=True)(split_kernel)
+
+def split_one(pts: np.ndarray, road_id: int, segment_m: float) -> List[Tuple]:
+    """
+    Split one road into (coords, seg_num, road_id, length_km, label) rows
+    
+    Pure NumPy so it can run in a worker process; coords is a list of
+    (x, y) pairs for the caller to turn into a Polyline.
+    """
+    if njit is not None:
+        starts, ends, split_xs, split_ys, lengths = split_kernel(
+            np.ascontiguousarray(pts[:, 0]), np.ascontiguousarray(pts[:, 1]), segment_m
+        )
+    else:
+        starts, ends, split_xs, split_ys, lengths = split_vertices(pts, segment_m)
+    split_xs, split_ys = split_xs.tolist(), split_ys.tolist()
+    prefix = f"R{road_id}_S"
+    rows = []
+    
+    for k in range(len(lengths)):
+        coords = ([(split_xs[k], split_ys[k])] +
+                  pts[starts[k]:ends[k]].tolist() +
+                  [(split_xs[k + 1], split_ys[k + 1])])
+        seg_num = k + 1
+        rows.append((coords, seg_num, road_id, float(lengths[k])/1000,
+                     segment_label(prefix, seg_num)))
+    
+    return rows
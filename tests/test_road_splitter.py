@@ -0,0 +1,86 @@
+"""
+Tests for the arcpy-free helpers in road_splitter, with arcpy stubbed out
+"""
+
+import sys
+from unittest import mock
+
+import pytest
+
+shapely = pytest.importorskip("shapely")
+
+sys.modules.setdefault("arcpy", mock.MagicMock())
+from src import road_splitter  # noqa: E402
+
+
+@pytest.fixture
+def install(monkeypatch):
+    """Report the given product and version from arcpy.GetInstallInfo"""
+    monkeypatch.setattr(road_splitter, "pa", object())
+    monkeypatch.setattr(road_splitter, "shapely", shapely)
+    
+    def set_install(product, version):
+        info = {"ProductName": product, "Version": version}
+        monkeypatch.setattr(road_splitter.arcpy, "GetInstallInfo", lambda: info)
+    
+    return set_install
+
+@pytest.mark.parametrize("version", ["11.0", "11.1", "11.2"])
+def test_arrow_rejects_server_before_11_3(install, version):
+    install("Server", version)
+    assert not road_splitter._arrow_supported()
+
+@pytest.mark.parametrize("version", ["11.3", "11.4", "12.0"])
+def test_arrow_accepts_server_11_3_and_later(install, version):
+    install("Server", version)
+    assert road_splitter._arrow_supported()
+
+def test_arrow_accepts_pro_3_3(install):
+    install("ArcGISPro", "3.3")
+    assert road_splitter._arrow_supported()
+
+def test_arrow_rejects_pro_3_2(install):
+    install("ArcGISPro", "3.2.1")
+    assert not road_splitter._arrow_supported()
+
+@pytest.mark.parametrize("product", ["Engine", "Desktop", None])
+def test_arrow_rejects_unknown_products(install, product):
+    install(product, "12.0")
+    assert not road_splitter._arrow_supported()
+
+def test_arrow_needs_pyarrow(install, monkeypatch):
+    install("ArcGISPro", "3.3")
+    monkeypatch.setattr(road_splitter, "pa", None)
+    assert not road_splitter._arrow_supported()
+
+class _Geometry:
+    """Stand-in for an arcpy geometry, which exposes its own WKB"""
+    
+    def __init__(self, coords):
+        self.WKB = bytearray(shapely.to_wkb(shapely.LineString(coords)))
+
+def _coords(wkb):
+    return shapely.get_coordinates(shapely.from_wkb(wkb)).tolist()
+
+def test_rows_to_wkb_keeps_mixed_order():
+    shapes = [
+        [(0.0, 0.0), (1.0, 0.0)],
+        _Geometry([(5.0, 5.0), (6.0, 6.0), (7.0, 5.0)]),
+        [(2.0, 0.0), (3.0, 1.0), (4.0, 0.0)],
+        _Geometry([(8.0, 8.0), (9.0, 9.0)]),
+        [(10.0, 0.0), (11.0, 0.0)],
+    ]
+    wkb = road_splitter._rows_to_wkb(shapes)
+    
+    assert all(isinstance(w, bytes) for w in wkb)
+    assert [_coords(w) for w in wkb] == [
+        [[0.0, 0.0], [1.0, 0.0]],
+        [[5.0, 5.0], [6.0, 6.0], [7.0, 5.0]],
+        [[2.0, 0.0], [3.0, 1.0], [4.0, 0.0]],
+        [[8.0, 8.0], [9.0, 9.0]],
+        [[10.0, 0.0], [11.0, 0.0]],
+    ]
+
+def test_rows_to_wkb_geometries_only():
+    wkb = road_splitter._rows_to_wkb([_Geometry([(0.0, 0.0), (1.0, 1.0)])])
+    assert [_coords(w) for w in wkb] == [[[0.0, 0.0], [1.0, 1.0]]]
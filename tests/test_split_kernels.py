@@ -0,0 +1,141 @@
+"""
+Tests for the arcpy-free splitting kernels
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from src.split_kernels import (oid_batches, segment_label, split_kernel, split_one,
+                               split_vertices)
+
+
+def _kernel_xy(pts, segment_m):
+    return split_kernel(np.ascontiguousarray(pts[:, 0]),
+                        np.ascontiguousarray(pts[:, 1]), segment_m)
+
+KERNELS = [split_vertices, _kernel_xy]
+
+def _pieces(pts, result):
+    """Rebuild each piece's vertex array from a kernel result"""
+    starts, ends, split_xs, split_ys, lengths = result
+    return [
+        np.vstack([[split_xs[k], split_ys[k]],
+                   pts[starts[k]:ends[k]],
+                   [split_xs[k + 1], split_ys[k + 1]]])
+        for k in range(len(lengths))
+    ]
+
+def _length(coords):
+    return float(np.hypot(*np.diff(coords, axis=0).T).sum())
+
+def _random_lines(n):
+    rng = np.random.default_rng(42)
+    for _ in range(n):
+        pts = np.cumsum(rng.normal(size=(rng.integers(2, 30), 2)) * 500, axis=0)
+        total = _length(pts)
+        yield pts, rng.uniform(total / 20, total * 0.9)
+
+def test_kernels_agree():
+    for pts, segment_m in _random_lines(500):
+        a = split_vertices(pts, segment_m)
+        b = _kernel_xy(pts, segment_m)
+        for x, y in zip(a, b):
+            assert x.shape == y.shape
+            assert np.allclose(x, y)
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_piece_count_and_lengths(kernel):
+    for pts, segment_m in _random_lines(200):
+        total = _length(pts)
+        result = kernel(pts, segment_m)
+        lengths = result[4]
+        
+        assert len(lengths) == math.ceil(total / segment_m)
+        assert np.allclose(lengths[:-1], segment_m)
+        assert lengths.sum() == pytest.approx(total)
+        for coords, expected in zip(_pieces(pts, result), lengths):
+            assert _length(coords) == pytest.approx(expected)
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_breakpoints_on_vertices(kernel):
+    pts = np.array([[0.0, 0.0], [2000.0, 0.0], [4000.0, 0.0], [6000.0, 0.0]])
+    pieces = _pieces(pts, kernel(pts, 2000.0))
+    
+    assert len(pieces) == 3
+    for coords in pieces:
+        assert not np.any(np.all(np.diff(coords, axis=0) == 0, axis=1))
+        assert _length(coords) == pytest.approx(2000.0)
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_exact_multiple_mid_edge(kernel):
+    pts = np.array([[0.0, 0.0], [3000.0, 0.0], [6000.0, 0.0]])
+    result = kernel(pts, 2000.0)
+    pieces = _pieces(pts, result)
+    
+    assert len(pieces) == 3
+    assert pieces[0].tolist() == [[0.0, 0.0], [2000.0, 0.0]]
+    assert pieces[1].tolist() == [[2000.0, 0.0], [3000.0, 0.0], [4000.0, 0.0]]
+    assert pieces[2].tolist() == [[4000.0, 0.0], [6000.0, 0.0]]
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_zero_length_edges(kernel):
+    pts = np.array([[0.0, 0.0], [0.0, 0.0], [1500.0, 0.0], [1500.0, 0.0],
+                    [1500.0, 2500.0], [1500.0, 2500.0]])
+    result = kernel(pts, 1000.0)
+    
+    for arr in result:
+        assert np.all(np.isfinite(arr))
+    assert len(result[4]) == 4
+    for coords, expected in zip(_pieces(pts, result), result[4]):
+        assert _length(coords) == pytest.approx(expected)
+    assert [result[2][-1], result[3][-1]] == [1500.0, 2500.0]
+
+def test_labels_past_255():
+    pts = np.array([[0.0, 0.0], [300 * 10.0, 0.0]])
+    rows = split_one(pts, 5, 10.0)
+    labels = [row[4] for row in rows]
+    
+    assert len(rows) == 300
+    assert [row[1] for row in rows] == list(range(1, 301))
+    assert labels[0] == "R5_S01"
+    assert labels[254] == "R5_S255"
+    assert labels[255] == "R5_S256"
+    assert labels[-1] == "R5_S300"
+    assert rows[0][3] == pytest.approx(0.01)
+
+@pytest.mark.parametrize("seg_num, label", [
+    (1, "R7_S01"), (99, "R7_S99"), (255, "R7_S255"), (256, "R7_S256"), (1000, "R7_S1000")
+])
+def test_segment_label(seg_num, label):
+    assert segment_label("R7_S", seg_num) == label
+
+READ_BATCH = 10000
+
+def _covered(oids, bounds):
+    oids = np.asarray(oids)
+    return np.concatenate([oids[(oids >= lo) & (oids <= hi)] for lo, hi in bounds])
+
+def test_oid_batches_empty():
+    assert oid_batches(np.array([], dtype=np.int64), READ_BATCH) == []
+
+def test_oid_batches_exact_multiple():
+    oids = np.arange(1, 2 * READ_BATCH + 1)
+    assert oid_batches(oids, READ_BATCH) == [(1, READ_BATCH),
+                                             (READ_BATCH + 1, 2 * READ_BATCH)]
+
+def test_oid_batches_multiple_plus_one():
+    oids = np.arange(1, 2 * READ_BATCH + 2)
+    bounds = oid_batches(oids, READ_BATCH)
+    
+    assert len(bounds) == 3
+    assert bounds[-1] == (2 * READ_BATCH + 1, 2 * READ_BATCH + 1)
+    assert np.array_equal(_covered(oids, bounds), oids)
+
+def test_oid_batches_single_id():
+    assert oid_batches(np.array([7]), READ_BATCH) == [(7, 7)]
+
+def test_oid_batches_sparse():
+    assert oid_batches(np.array([1, 50000000]), READ_BATCH) == [(1, 50000000)]
+    assert oid_batches(np.array([1, 50000000]), 1) == [(1, 1), (50000000, 50000000)]